@@ -6,41 +6,35 @@ communicates with the MCP server for tool execution with elicitation support.
 """
 
 import asyncio
+import functools
 import json
 import logging
 import os
-import uuid
+import time
 from contextlib import asynccontextmanager
-from dataclasses import dataclass, field
-from typing import Any, Awaitable, Callable, Dict, List, Optional
+from itertools import count
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
+import orjson
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastmcp import Client
 from fastmcp.client.transports import StreamableHttpTransport
-from openai import OpenAI
+from openai import AsyncOpenAI
 from pydantic import BaseModel
 from sse_starlette.sse import EventSourceResponse
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Session/elicitation IDs are opaque correlators, so a process-local counter
+# (plus a timestamp to disambiguate restarts) beats paying uuid4's entropy
+# read and object allocation on every chat request.
+_session_counter = count()
+_elicitation_counter = count()
 
-# --- Elicitation Service ---
-
-
-@dataclass
-class PendingElicitation:
-    """
-    Stores metadata about a pending elicitation request.
 
-    The future is resolved when the user responds via the respond endpoint.
-    """
-
-    request_id: str
-    message: str
-    schema: Optional[Dict[str, Any]] = None
-    future: asyncio.Future = field(default_factory=asyncio.Future)
+# --- Elicitation Service ---
 
 
 class ElicitationService:
@@ -52,27 +46,19 @@ class ElicitationService:
     """
 
     def __init__(self):
-        self._pending: Dict[str, PendingElicitation] = {}
+        # The message/schema already travel in the SSE event, so only the
+        # future needs to be kept around until the user responds.
+        self._pending: Dict[str, asyncio.Future] = {}
 
-    def create_request(
-        self,
-        request_id: str,
-        message: str,
-        schema: Optional[Dict[str, Any]] = None,
-    ) -> asyncio.Future:
+    def create_request(self, request_id: str, message: str) -> asyncio.Future:
         """
         Create a new elicitation request and return a future to await.
 
         The future resolves when respond() is called with matching request_id.
         """
-        logger.info(f"Creating elicitation request: {request_id}")
+        logger.info(f"Creating elicitation request: {request_id} ({message})")
         future: asyncio.Future = asyncio.Future()
-        self._pending[request_id] = PendingElicitation(
-            request_id=request_id,
-            message=message,
-            schema=schema,
-            future=future,
-        )
+        self._pending[request_id] = future
         return future
 
     async def respond(self, request_id: str, response_data: Dict[str, Any]) -> bool:
@@ -82,22 +68,20 @@ class ElicitationService:
         Returns True if the request was found and resolved.
         """
         logger.info(f"Responding to elicitation {request_id}")
-        pending = self._pending.get(request_id)
-        if not pending or pending.future.done():
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
             return False
 
-        pending.future.set_result(response_data)
-        del self._pending[request_id]
+        future.set_result(response_data)
         return True
 
     def cancel(self, request_id: str) -> bool:
         """Cancel a pending elicitation request."""
-        pending = self._pending.get(request_id)
-        if pending and not pending.future.done():
-            pending.future.cancel()
-            del self._pending[request_id]
-            return True
-        return False
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            return False
+        future.cancel()
+        return True
 
 
 elicitation_service = ElicitationService()
@@ -113,11 +97,18 @@ def extract_options_from_schema(schema: Dict[str, Any]) -> Optional[List[str]]:
     """
     Extract enum options from a JSON schema for UI rendering.
 
-    Handles nested enum definitions in properties.
+    Handles nested enum definitions in properties. Tool schemas are static
+    per tool version, so results are memoized on the serialized schema.
     """
     if not schema:
         return None
+    return _extract_options(orjson.dumps(schema, option=orjson.OPT_SORT_KEYS))
 
+
+@functools.lru_cache(maxsize=256)
+def _extract_options(schema_key: bytes) -> Optional[List[str]]:
+    """Cached worker for extract_options_from_schema, keyed on sorted JSON."""
+    schema = orjson.loads(schema_key)
     properties = schema.get("properties", {})
     for prop in properties.values():
         if "enum" in prop:
@@ -131,57 +122,123 @@ class MCPClient:
     """
     Client for communicating with the MCP server.
 
-    Uses per-request connections and supports elicitation callbacks.
+    Holds one long-lived connection for tool listing and execution, plus
+    per-session connections when elicitation callbacks are needed.
     """
 
     def __init__(self):
         url = os.getenv("MCP_SERVER_URL", "http://localhost:8003/mcp")
         self.mcp_server_url = url.rstrip("/")
-        self._tools_cache: List = []
+        self._tools_cache: Tuple[Dict[str, Any], ...] = ()
+        self._client: Optional[Client] = None
+        self._session_clients: Dict[str, Client] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
 
-    @asynccontextmanager
-    async def _get_client(self, elicitation_handler=None):
-        """Create a fresh MCP client connection."""
+    def _new_client(self, elicitation_handler=None) -> Client:
+        """Construct an MCP client (not yet connected)."""
         transport = StreamableHttpTransport(url=self.mcp_server_url)
-        client = Client(transport, elicitation_handler=elicitation_handler)
-        async with client:
-            yield client
+        return Client(transport, elicitation_handler=elicitation_handler)
+
+    async def connect(self) -> None:
+        """Open the shared long-lived MCP connection. Called at startup."""
+        if self._client is None:
+            client = self._new_client()
+            await client.__aenter__()
+            self._client = client
+            logger.info("Connected to MCP server")
+
+    @staticmethod
+    async def _close_client(client: Client) -> None:
+        """Best-effort close of a connected client."""
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception:
+            pass
+
+    async def disconnect(self) -> None:
+        """Close the shared connection and any session connections."""
+        for client in self._session_clients.values():
+            await self._close_client(client)
+        self._session_clients.clear()
+        self._session_locks.clear()
+        if self._client is not None:
+            await self._close_client(self._client)
+            self._client = None
+
+    async def _get_client(self) -> Client:
+        """Return the shared client, reconnecting if the connection dropped."""
+        if self._client is not None and not self._client.is_connected():
+            await self.disconnect()
+        if self._client is None:
+            await self.connect()
+        return self._client
+
+    async def _get_session_client(self, session_id: str, elicitation_handler) -> Client:
+        """
+        Return a connection dedicated to a chat session.
+
+        Elicitation handlers are bound at client construction, so sessions
+        that need elicitation get their own connection, reused across the
+        session's tool calls and closed via release_session().
+        """
+        # Lock per session so concurrent tool calls (MCP_PARALLEL_TOOLS)
+        # don't each open a connection and overwrite each other's entry.
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            client = self._session_clients.get(session_id)
+            if client is not None and not client.is_connected():
+                self._session_clients.pop(session_id, None)
+                await self._close_client(client)
+                client = None
+            if client is None:
+                client = self._new_client(elicitation_handler=elicitation_handler)
+                await client.__aenter__()
+                self._session_clients[session_id] = client
+            return client
+
+    async def release_session(self, session_id: str) -> None:
+        """Close and forget a session's dedicated connection."""
+        self._session_locks.pop(session_id, None)
+        client = self._session_clients.pop(session_id, None)
+        if client is not None:
+            await self._close_client(client)
 
     async def is_healthy(self) -> bool:
         """Check if MCP server is reachable."""
         try:
-            async with self._get_client() as client:
-                tools = await client.list_tools()
-                return len(tools) > 0
+            client = await self._get_client()
+            tools = await client.list_tools()
+            return len(tools) > 0
         except Exception as e:
             logger.warning(f"MCP health check failed: {e}")
             return False
 
-    async def get_tools(self) -> List[Dict[str, Any]]:
+    async def get_tools(self) -> Tuple[Dict[str, Any], ...]:
         """
         Fetch tools from MCP server and convert to OpenAI format.
 
-        Caches tools after first fetch for efficiency.
+        Caches tools as an immutable tuple after first fetch so callers
+        cannot mutate the shared schema dicts.
         """
         if not self._tools_cache:
             try:
-                async with self._get_client() as client:
-                    mcp_tools = await client.list_tools()
-                    self._tools_cache = [
-                        {
-                            "type": "function",
-                            "function": {
-                                "name": t.name,
-                                "description": t.description,
-                                "parameters": t.inputSchema,
-                            },
-                        }
-                        for t in mcp_tools
-                    ]
-                    logger.info(f"Cached {len(self._tools_cache)} tools from MCP")
+                client = await self._get_client()
+                mcp_tools = await client.list_tools()
+                self._tools_cache = tuple(
+                    {
+                        "type": "function",
+                        "function": {
+                            "name": t.name,
+                            "description": t.description,
+                            "parameters": t.inputSchema,
+                        },
+                    }
+                    for t in mcp_tools
+                )
+                logger.info(f"Cached {len(self._tools_cache)} tools from MCP")
             except Exception as e:
                 logger.error(f"Failed to fetch MCP tools: {e}")
-                return []
+                return ()
         return self._tools_cache
 
     def create_elicitation_handler(
@@ -197,7 +254,7 @@ class MCPClient:
 
         async def handler(message: str, response_type, params, context):
             """Handle elicitation request from MCP server."""
-            elicitation_id = f"{session_id}_{uuid.uuid4().hex[:8]}"
+            elicitation_id = f"{session_id}_{next(_elicitation_counter):x}"
             logger.info(f"[ELICIT] Handler called: {message}")
 
             schema = None
@@ -231,15 +288,16 @@ class MCPClient:
             future = elicitation_service.create_request(
                 request_id=elicitation_id,
                 message=message,
-                schema=schema,
             )
 
             try:
                 logger.info(f"[ELICIT] Waiting for user response: {elicitation_id}")
-                response_data = await asyncio.wait_for(future, timeout=300.0)
+                # asyncio.timeout avoids the wrapper Task that wait_for spawns
+                async with asyncio.timeout(300.0):
+                    response_data = await future
                 logger.info(f"[ELICIT] Got response: {response_data}")
                 return response_data
-            except asyncio.TimeoutError:
+            except TimeoutError:
                 logger.warning(f"Elicitation {elicitation_id} timed out")
                 return {"action": "cancel", "value": None}
             except asyncio.CancelledError:
@@ -265,26 +323,34 @@ class MCPClient:
             handler = self.create_elicitation_handler(session_id, sse_callback)
 
         try:
-            async with self._get_client(elicitation_handler=handler) as client:
-                result = await client.call_tool(name=tool_name, arguments=arguments)
-                logger.info(f"Tool result type: {type(result)}")
-
-                # Handle CallToolResult object
-                if hasattr(result, "structured_content") and result.structured_content:
-                    return result.structured_content
-                if hasattr(result, "content") and result.content:
-                    # content is a list of TextContent objects
-                    for item in result.content:
-                        if hasattr(item, "text"):
-                            try:
-                                return json.loads(item.text)
-                            except json.JSONDecodeError:
-                                pass
-                # Legacy handling for list results
-                if isinstance(result, list) and len(result) > 0:
-                    if hasattr(result[0], "text"):
-                        return json.loads(result[0].text)
-                return {"result": str(result)}
+            if handler and session_id:
+                client = await self._get_session_client(session_id, handler)
+            else:
+                client = await self._get_client()
+            result = await client.call_tool(name=tool_name, arguments=arguments)
+            logger.info(f"Tool result type: {type(result)}")
+
+            # Handle CallToolResult object; getattr avoids the exception
+            # machinery that hasattr checks go through.
+            structured = getattr(result, "structured_content", None)
+            if structured:
+                return structured
+            content = getattr(result, "content", None)
+            if content:
+                # content is a list of TextContent objects
+                for item in content:
+                    text = getattr(item, "text", None)
+                    if text is not None:
+                        try:
+                            return orjson.loads(text)
+                        except orjson.JSONDecodeError:
+                            pass
+            # Legacy handling for list results
+            if isinstance(result, list) and len(result) > 0:
+                text = getattr(result[0], "text", None)
+                if text is not None:
+                    return orjson.loads(text)
+            return {"result": str(result)}
         except Exception as e:
             logger.error(f"Tool execution failed: {e}")
             return {"error": str(e)}
@@ -296,6 +362,32 @@ mcp_client = MCPClient()
 # --- Chat Service ---
 
 
+def _sse(obj: Any) -> bytes:
+    """
+    Serialize a payload into pre-framed SSE wire bytes.
+
+    EventSourceResponse passes bytes chunks through verbatim, so framing
+    here once avoids a per-token ServerSentEvent construction + re-encode.
+    """
+    return b"data: " + orjson.dumps(obj) + b"\r\n\r\n"
+
+
+def _sse_tool_result(name: str, encoded_result: bytes) -> bytes:
+    """
+    Frame a tool_result event around an already-encoded result payload.
+
+    The encoded bytes are spliced in directly so the result dict is
+    serialized once and shared with the follow-up tool message.
+    """
+    return (
+        b'data: {"type":"tool_result","name":'
+        + orjson.dumps(name)
+        + b',"result":'
+        + encoded_result
+        + b"}\r\n\r\n"
+    )
+
+
 class ChatService:
     """
     Orchestrates chat completions with OpenAI and MCP tool execution.
@@ -304,23 +396,35 @@ class ChatService:
     """
 
     def __init__(self):
-        self._openai: Optional[OpenAI] = None
+        self._openai: Optional[AsyncOpenAI] = None
 
     @property
-    def openai(self) -> OpenAI:
-        """Lazy-initialize OpenAI client."""
+    def openai(self) -> AsyncOpenAI:
+        """Lazy-initialize async OpenAI client."""
         if self._openai is None:
-            self._openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self._openai = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         return self._openai
 
-    async def stream_completion(self, messages: List[Dict[str, Any]]):
+    async def _emit(self, stream):
+        """Serialize chunks from an OpenAI stream into pre-framed SSE bytes."""
+        async for chunk in stream:
+            yield _sse(chunk.model_dump(mode="json", exclude_none=True))
+
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: Tuple[Dict[str, Any], ...] = (),
+    ):
         """
         Stream a chat completion with tool support and elicitation.
 
-        Yields SSE-formatted events for the frontend.
+        Yields SSE-formatted events for the frontend. Tools are normally
+        handed in from app.state (prefetched at startup).
         """
-        session_id = f"chat_{uuid.uuid4().hex}"
-        elicitation_queue: asyncio.Queue = asyncio.Queue()
+        session_id = f"chat_{next(_session_counter):x}_{time.time_ns():x}"
+        # Bounded so a stalled consumer applies backpressure to the MCP
+        # handler instead of buffering events without limit.
+        elicitation_queue: asyncio.Queue = asyncio.Queue(maxsize=64)
 
         system_prompt = {
             "role": "system",
@@ -333,7 +437,10 @@ class ChatService:
         }
         messages = [system_prompt] + messages
 
-        tools = await mcp_client.get_tools()
+        if not tools:
+            # Fallback for when the startup prefetch raced an MCP server
+            # that came up late.
+            tools = await mcp_client.get_tools()
 
         kwargs = {
             "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
@@ -341,162 +448,199 @@ class ChatService:
             "stream": True,
         }
         if tools:
-            kwargs["tools"] = tools
+            kwargs["tools"] = list(tools)
             kwargs["tool_choice"] = "auto"
 
-        response = self.openai.chat.completions.create(**kwargs)
+        response = await self.openai.chat.completions.create(**kwargs)
 
-        tool_calls_data = {}
+        # OpenAI tool-call indices are dense 0..N ints, so a list indexed by
+        # tc.index is cheaper than a dict and needs no sorting afterwards.
+        tool_calls_data: List[Dict[str, Any]] = []
         finish_reason = None
 
-        for chunk in response:
-            chunk_dict = {
-                "id": chunk.id,
-                "object": chunk.object,
-                "created": chunk.created,
-                "model": chunk.model,
-                "choices": [],
-            }
+        async for chunk in response:
+            # pydantic-core serializes the whole chunk in Rust; far cheaper
+            # than rebuilding the dict attribute by attribute.
+            chunk_dict = chunk.model_dump(mode="json", exclude_none=True)
 
             for choice in chunk.choices:
-                choice_dict = {
-                    "index": choice.index,
-                    "delta": {},
-                    "finish_reason": choice.finish_reason,
-                }
-
                 if choice.finish_reason:
                     finish_reason = choice.finish_reason
 
                 if choice.delta.tool_calls:
                     for tc in choice.delta.tool_calls:
-                        idx = tc.index
-                        if idx not in tool_calls_data:
-                            tool_calls_data[idx] = {
-                                "id": "",
-                                "type": "function",
-                                "function": {"name": "", "arguments": ""},
-                            }
+                        while len(tool_calls_data) <= tc.index:
+                            tool_calls_data.append(
+                                {
+                                    "id": "",
+                                    "type": "function",
+                                    "function": {"name": "", "arguments": ""},
+                                }
+                            )
+                        entry = tool_calls_data[tc.index]
                         if tc.id:
-                            tool_calls_data[idx]["id"] = tc.id
+                            entry["id"] = tc.id
                         if tc.function:
                             if tc.function.name:
-                                tool_calls_data[idx]["function"]["name"] = tc.function.name
+                                entry["function"]["name"] = tc.function.name
                             if tc.function.arguments:
-                                tool_calls_data[idx]["function"]["arguments"] += tc.function.arguments
-
-                    choice_dict["delta"]["tool_calls"] = [
-                        {
-                            "index": tc.index,
-                            "id": tc.id,
-                            "type": tc.type,
-                            "function": {
-                                "name": tc.function.name if tc.function else None,
-                                "arguments": tc.function.arguments if tc.function else None,
-                            },
-                        }
-                        for tc in choice.delta.tool_calls
-                    ]
-
-                if choice.delta.role:
-                    choice_dict["delta"]["role"] = choice.delta.role
-                if choice.delta.content:
-                    choice_dict["delta"]["content"] = choice.delta.content
-
-                chunk_dict["choices"].append(choice_dict)
-
-            yield json.dumps(chunk_dict)
+                                entry["function"]["arguments"] += tc.function.arguments
+
+            yield _sse(chunk_dict)
 
         if finish_reason == "tool_calls" and tool_calls_data:
+            # tool_calls_data is already accumulated in the OpenAI message
+            # shape, so it can be attached as-is.
             assistant_message = {
                 "role": "assistant",
                 "content": None,
-                "tool_calls": [
-                    {
-                        "id": tool_calls_data[i]["id"],
-                        "type": "function",
-                        "function": {
-                            "name": tool_calls_data[i]["function"]["name"],
-                            "arguments": tool_calls_data[i]["function"]["arguments"],
-                        },
-                    }
-                    for i in sorted(tool_calls_data.keys())
-                ],
+                "tool_calls": tool_calls_data,
             }
 
             tool_results = []
-            for tc_data in [tool_calls_data[i] for i in sorted(tool_calls_data.keys())]:
-                tool_name = tc_data["function"]["name"]
-                tool_id = tc_data["id"]
+            active_tasks: List[asyncio.Task] = []
+            get_task: Optional[asyncio.Task] = None
 
+            async def sse_callback(event: Dict[str, Any]):
+                await elicitation_queue.put(event)
+
+            # Pre-parse arguments so both execution strategies share it.
+            calls = []
+            for tc_data in tool_calls_data:
                 try:
                     arguments = json.loads(tc_data["function"]["arguments"])
                 except json.JSONDecodeError:
                     arguments = {}
+                calls.append((tc_data, arguments))
 
-                yield json.dumps({'type': 'tool_start', 'name': tool_name, 'args': arguments})
-
-                async def sse_callback(event: Dict[str, Any]):
-                    await elicitation_queue.put(event)
-
-                tool_task = asyncio.create_task(
-                    mcp_client.execute_tool(
-                        tool_name=tool_name,
-                        arguments=arguments,
-                        session_id=session_id,
-                        sse_callback=sse_callback,
-                    )
-                )
-
-                while not tool_task.done():
-                    try:
-                        event = await asyncio.wait_for(elicitation_queue.get(), timeout=0.1)
-                        yield json.dumps(event)
-                    except asyncio.TimeoutError:
-                        continue
-
-                result = await tool_task
-                yield json.dumps({'type': 'tool_result', 'name': tool_name, 'result': result})
+            # Concurrent execution interleaves elicitations and assumes the
+            # tools are order-independent, so it stays opt-in.
+            parallel = (
+                len(calls) > 1 and os.getenv("MCP_PARALLEL_TOOLS", "0") == "1"
+            )
 
-                tool_results.append(
-                    {
-                        "role": "tool",
-                        "tool_call_id": tool_id,
-                        "content": json.dumps(result),
-                    }
-                )
+            try:
+                if parallel:
+                    task_info: Dict[asyncio.Task, Dict[str, Any]] = {}
+                    for tc_data, arguments in calls:
+                        tool_name = tc_data["function"]["name"]
+                        yield _sse({"type": "tool_start", "name": tool_name, "args": arguments})
+                        task = asyncio.create_task(
+                            mcp_client.execute_tool(
+                                tool_name=tool_name,
+                                arguments=arguments,
+                                session_id=session_id,
+                                sse_callback=sse_callback,
+                            )
+                        )
+                        active_tasks.append(task)
+                        task_info[task] = tc_data
+
+                    pending = set(active_tasks)
+                    get_task = asyncio.create_task(elicitation_queue.get())
+                    while pending:
+                        done, _ = await asyncio.wait(
+                            {get_task, *pending},
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                        if get_task in done:
+                            yield _sse(get_task.result())
+                            get_task = asyncio.create_task(elicitation_queue.get())
+                        for task in done:
+                            if task not in pending:
+                                continue
+                            pending.discard(task)
+                            tc_data = task_info[task]
+                            encoded = orjson.dumps(task.result())
+                            yield _sse_tool_result(tc_data["function"]["name"], encoded)
+                            tool_results.append(
+                                {
+                                    "role": "tool",
+                                    "tool_call_id": tc_data["id"],
+                                    "content": encoded.decode(),
+                                }
+                            )
+                    # The getter may have consumed an event while this
+                    # generator was suspended in a yield; cancel it first and
+                    # surface any result it already holds before draining.
+                    get_task.cancel()
+                    if get_task.done() and not get_task.cancelled():
+                        yield _sse(get_task.result())
+                    while not elicitation_queue.empty():
+                        yield _sse(elicitation_queue.get_nowait())
+                else:
+                    for tc_data, arguments in calls:
+                        tool_name = tc_data["function"]["name"]
+                        tool_id = tc_data["id"]
+
+                        yield _sse({"type": "tool_start", "name": tool_name, "args": arguments})
+
+                        tool_task = asyncio.create_task(
+                            mcp_client.execute_tool(
+                                tool_name=tool_name,
+                                arguments=arguments,
+                                session_id=session_id,
+                                sse_callback=sse_callback,
+                            )
+                        )
+                        active_tasks.append(tool_task)
+
+                        get_task = asyncio.create_task(elicitation_queue.get())
+                        while True:
+                            done, _ = await asyncio.wait(
+                                {get_task, tool_task},
+                                return_when=asyncio.FIRST_COMPLETED,
+                            )
+                            if get_task in done:
+                                yield _sse(get_task.result())
+                                get_task = asyncio.create_task(elicitation_queue.get())
+                            if tool_task in done:
+                                # The getter may have consumed an event while
+                                # this generator was suspended in a yield;
+                                # cancel it first and surface any result it
+                                # already holds, then drain what is left.
+                                get_task.cancel()
+                                if get_task.done() and not get_task.cancelled():
+                                    yield _sse(get_task.result())
+                                while not elicitation_queue.empty():
+                                    yield _sse(elicitation_queue.get_nowait())
+                                break
+
+                        encoded = orjson.dumps(await tool_task)
+                        yield _sse_tool_result(tool_name, encoded)
+
+                        tool_results.append(
+                            {
+                                "role": "tool",
+                                "tool_call_id": tool_id,
+                                "content": encoded.decode(),
+                            }
+                        )
+            except (asyncio.CancelledError, GeneratorExit):
+                # Client disconnected mid-tool: cancel the in-flight MCP calls
+                # rather than leaving them waiting on an elicitation nobody
+                # will answer.
+                logger.info(f"Client disconnected, cancelling tool work for {session_id}")
+                for task in (*active_tasks, get_task):
+                    if task is not None and not task.done():
+                        task.cancel()
+                raise
+            finally:
+                # Shielded so the close still completes when this generator
+                # is itself being cancelled or closed.
+                await asyncio.shield(mcp_client.release_session(session_id))
 
             new_messages = messages + [assistant_message] + tool_results
-            follow_up = self.openai.chat.completions.create(
+            follow_up = await self.openai.chat.completions.create(
                 model=os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
                 messages=new_messages,
                 stream=True,
             )
 
-            for chunk in follow_up:
-                chunk_dict = {
-                    "id": chunk.id,
-                    "object": chunk.object,
-                    "created": chunk.created,
-                    "model": chunk.model,
-                    "choices": [],
-                }
+            async for payload in self._emit(follow_up):
+                yield payload
 
-                for choice in chunk.choices:
-                    choice_dict = {
-                        "index": choice.index,
-                        "delta": {},
-                        "finish_reason": choice.finish_reason,
-                    }
-                    if choice.delta.role:
-                        choice_dict["delta"]["role"] = choice.delta.role
-                    if choice.delta.content:
-                        choice_dict["delta"]["content"] = choice.delta.content
-                    chunk_dict["choices"].append(choice_dict)
-
-                yield json.dumps(chunk_dict)
-
-        yield "[DONE]"
+        yield b"data: [DONE]\r\n\r\n"
 
 
 chat_service = ChatService()
@@ -509,13 +653,16 @@ chat_service = ChatService()
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup/shutdown."""
     logger.info("Starting MCP Elicitation Demo Backend")
-    healthy = await mcp_client.is_healthy()
-    if healthy:
+    try:
+        await mcp_client.connect()
         logger.info("MCP server is healthy")
-    else:
-        logger.warning("MCP server is not reachable")
+    except Exception as e:
+        logger.warning(f"MCP server is not reachable: {e}")
+    # Prefetch the tool schemas so /chat skips the cache check entirely.
+    app.state.tools = await mcp_client.get_tools()
     yield
     logger.info("Shutting down")
+    await mcp_client.disconnect()
 
 
 app = FastAPI(
@@ -560,7 +707,9 @@ async def chat(request: ChatRequest):
 
     Returns Server-Sent Events with chat chunks and elicitation requests.
     """
-    return EventSourceResponse(chat_service.stream_completion(request.messages))
+    return EventSourceResponse(
+        chat_service.stream_completion(request.messages, tools=app.state.tools)
+    )
 
 
 @app.post("/elicitation/respond")
@@ -589,4 +738,4 @@ async def list_tools():
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8002)
+    uvicorn.run(app, host="0.0.0.0", port=8002, loop="uvloop", http="httptools")
@@ -6,9 +6,11 @@ is missing, the tool uses MCP elicitation to gather it from the user.
 """
 
 import os
+import time
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+import uvloop
 from fastmcp import FastMCP
 from fastmcp.server.dependencies import get_context
 from pydantic import BaseModel, Field
@@ -48,12 +50,30 @@ class MeetingResult(BaseModel):
     message: str
 
 
+# Cached (monotonic timestamp, count, slots); slots only change when the
+# clock passes the next slot boundary, so a short TTL is plenty.
+_slots_cache: Optional[Tuple[float, int, List[str]]] = None
+_SLOTS_TTL_SECONDS = 60.0
+
+
 def generate_available_time_slots(count: int = 6) -> List[str]:
     """
     Generate available time slots for the next few days.
 
     Returns human-readable time slot strings like "Monday 10:00 AM".
+    Results are cached for a minute to avoid rebuilding 18 datetime
+    objects on every elicitation.
     """
+    global _slots_cache
+
+    now_mono = time.monotonic()
+    if (
+        _slots_cache is not None
+        and _slots_cache[1] == count
+        and now_mono - _slots_cache[0] < _SLOTS_TTL_SECONDS
+    ):
+        return _slots_cache[2]
+
     now = datetime.now()
     time_slots = []
 
@@ -64,8 +84,10 @@ def generate_available_time_slots(count: int = 6) -> List[str]:
             if slot_time > now:
                 time_slots.append(slot_time.strftime("%A %I:%M %p"))
                 if len(time_slots) >= count:
+                    _slots_cache = (now_mono, count, time_slots)
                     return time_slots
 
+    _slots_cache = (now_mono, count, time_slots)
     return time_slots
 
 
@@ -224,4 +246,13 @@ if __name__ == "__main__":
     host = os.getenv("MCP_HOST", "0.0.0.0")
     port = int(os.getenv("MCP_PORT", "8003"))
 
-    mcp.run(transport="streamable-http", host=host, port=port)
+    # fastmcp serves on an already-running loop, so uvicorn's loop setting
+    # never applies; installing the uvloop policy up front is what makes
+    # anyio.run() pick it. httptools is read from config per-connection.
+    uvloop.install()
+    mcp.run(
+        transport="streamable-http",
+        host=host,
+        port=port,
+        uvicorn_config={"http": "httptools"},
+    )